@@ -1,29 +1,113 @@
 """Chart and visualization functions for Claude Code usage analysis."""
 
+import bisect
+import functools
+import io
+import itertools
+import math
+import sys
 from datetime import timedelta
 from formatting import format_y_axis_value, format_total_value
 
+# Stacked bar chart cells (ANSI 256-color codes)
+CELL_INPUT = "\033[38;5;51m\u2588\033[0m"  # Input tokens (Bright Cyan)
+CELL_OUTPUT = "\033[38;5;46m\u2593\033[0m"  # Output tokens (Bright Green)
+CELL_CACHE_OUTPUT = "\033[38;5;214m\u2592\033[0m"  # Cache output tokens (Bright Orange)
+CELL_CACHE_INPUT = "\u2588"  # Cache input tokens (default color)
+CELL_CACHE_INPUT_ALL = "\u2588\u2591"  # Cache input tokens in the 'all' chart
+CELL_SEPARATOR = "|"  # Day separator
+CELL_EMPTY = " "  # Empty space
+
+# Y-axis rounding units: 5, 5K, 5M, 5B
+ROUNDING_UNITS = (5, 5_000, 5_000_000, 5_000_000_000)
+
+WEEKDAY_ABBR = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def _bucket_starts(sorted_times, max_columns=500):
+    """Split hourly times into midnight-aligned buckets that fit in max_columns.
+
+    Returns (hours_per_bucket, starts), where starts are the indices of the
+    first hour of each bucket. Bucket sizes divide a day (or are whole days)
+    so day boundaries always fall on the start of a bucket.
+    """
+    num_hours = len(sorted_times)
+    first_hour = sorted_times[0].hour
+    hours_per_bucket = 1
+    lead = 0
+    for hours_per_bucket in itertools.chain((1, 2, 3, 4, 6, 8, 12), itertools.count(24, 24)):
+        # Hours between the start of the first bucket and the first data point
+        lead = first_hour % hours_per_bucket if hours_per_bucket < 24 else first_hour
+        if -(-(num_hours + lead) // hours_per_bucket) <= max_columns:
+            break
+
+    starts = [0] + list(range(hours_per_bucket - lead, num_hours, hours_per_bucket))
+    if starts[1:2] == [0]:
+        starts = starts[1:]
+    return hours_per_bucket, starts
+
+
+def _sum_buckets(values, starts):
+    """Sum values into the buckets beginning at the given start indices."""
+    ends = starts[1:] + [len(values)]
+    return [sum(values[start:end]) for start, end in zip(starts, ends)]
+
+
+def _round_to_5_multiple(value, round_up=True):
+    """Round value to nearest multiple of 5B/5M/5K (or 5 below 5K)."""
+    value = int(value)
+
+    # The unit is the largest of 5, 5K, 5M and 5B not exceeding the value:
+    # its index is the number of whole thousands in value / 5 (capped at billions)
+    fives = value // 5
+    unit = ROUNDING_UNITS[min(3, int(math.log10(fives)) // 3)] if fives > 0 else ROUNDING_UNITS[0]
+
+    if round_up:
+        return ((value + unit - 1) // unit) * unit
+    else:
+        return (value // unit) * unit
 
-def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all', show_x_axis=True):
-    """Print a text-based stacked bar chart of token usage breakdown over time.
+
+@functools.lru_cache(maxsize=1024)
+def _stacked_column(cells, heights, chart_height):
+    """Build one stacked bar column bottom-up from per-layer cells and heights.
+
+    Cached because many columns share the same heights (idle hours in particular).
+    """
+    # Row r belongs to the first layer whose cumulative height exceeds r, so each
+    # layer fills the rows between the previous threshold and its own (clamped to
+    # the chart height) and everything above the last threshold is empty
+    column = []
+    filled = 0
+    for cell, threshold in zip(cells, itertools.accumulate(heights)):
+        threshold = min(threshold, chart_height)
+        if threshold > filled:
+            column += [cell] * (threshold - filled)
+            filled = threshold
+    column += [CELL_EMPTY] * (chart_height - filled)
+    return tuple(column)
+
+
+def prepare_stacked_bar_chart(time_series, days_back=7):
+    """Prepare the chart-type independent data for stacked bar charts.
+
+    The result can be rendered several times (e.g. as 'io' and 'cache' charts)
+    with render_stacked_bar_chart without repeating this work.
 
     Args:
-        time_series: Time series data with token breakdown
-        height: Height of the chart
+        time_series: Time series data with token breakdown, as returned by
+            calculate_token_breakdown_time_series (parallel lists sorted by time)
         days_back: Number of days to show
-        chart_type: 'all' (all 4 types), 'io' (input+output), or 'cache' (cache_creation+cache_read)
-        show_x_axis: Whether to show X-axis labels
+
+    Returns:
+        Prepared chart data, or None if there is not enough data for a chart
     """
-    if not time_series:
+    if not time_series or not time_series['times']:
         print("No time series data available.")
-        return
+        return None
 
-    # Sort by time
-    all_sorted_times = sorted(time_series.keys())
-
-    if not all_sorted_times:
-        print("No data available.")
-        return
+    # Times are already sorted by the stats function
+    all_sorted_times = time_series['times']
 
     # Calculate start time based on days_back parameter
     last_time = all_sorted_times[-1]
@@ -34,38 +118,136 @@ def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all
 
     # Create a complete continuous time series (every hour)
     # This ensures uniform spacing even when there's no data
-    sorted_times = []
-    current_time = start_time_rounded
-    while current_time <= last_time:
-        sorted_times.append(current_time)
-        current_time += timedelta(hours=1)
+    one_hour = timedelta(hours=1)
+    num_hours = (last_time - start_time_rounded) // one_hour + 1
+    sorted_times = [start_time_rounded + hour * one_hour for hour in range(num_hours)]
 
     if len(sorted_times) < 2:
         print("Not enough data points for chart.")
-        return
+        return None
+
+    # Scatter the per-interval breakdown into per-hour lists (hours without data are zero).
+    # Interval times are whole hours, so each one maps to an hour offset from the start.
+    input_vals = [0] * num_hours
+    output_vals = [0] * num_hours
+    cache_creation_vals = [0] * num_hours
+    cache_read_vals = [0] * num_hours
+    for i in range(bisect.bisect_left(all_sorted_times, start_time_rounded), len(all_sorted_times)):
+        pos = (all_sorted_times[i] - start_time_rounded) // one_hour
+        input_vals[pos] = time_series['input'][i]
+        output_vals[pos] = time_series['output'][i]
+        cache_creation_vals[pos] = time_series['cache_creation'][i]
+        cache_read_vals[pos] = time_series['cache_read'][i]
 
     # Limit chart width to 500 columns
+    hours_per_interval = 1
     if len(sorted_times) > 500:
         # Adjust interval to fit in 500 columns
-        hours_per_interval = len(sorted_times) / 500
-        print(f"Note: Adjusting interval to ~{hours_per_interval:.1f} hours to fit in 500 columns.")
+        hours_per_interval, starts = _bucket_starts(sorted_times)
+
+        # Sum the hours of each bucket so no usage is dropped
+        sorted_times = [sorted_times[i] for i in starts]
+        input_vals = _sum_buckets(input_vals, starts)
+        output_vals = _sum_buckets(output_vals, starts)
+        cache_creation_vals = _sum_buckets(cache_creation_vals, starts)
+        cache_read_vals = _sum_buckets(cache_read_vals, starts)
+
+    # Build chart:
+    # First day: data points (no separator, Y-axis serves as the boundary)
+    # Subsequent days: separator + data points
+    chart_columns = []  # List of (type, value)
+    data_to_col = {}  # Map data point index to column index
+
+    col_idx = 0
+    for i, time in enumerate(sorted_times):
+        # Add separator before 00:00 (except for the very first day)
+        if time.hour == 0 and time.minute == 0 and i > 0:
+            chart_columns.append(('separator', None))
+            col_idx += 1
+
+        # Add data point
+        chart_columns.append(('data', i))
+        data_to_col[i] = col_idx
+        col_idx += 1
+
+    # Find the days shown in the chart as (mid_col, day_start, first_idx, end_idx),
+    # so daily totals can be summed per chart type from data points [first_idx, end_idx)
+    days = []
+    current_day_start_idx = None
+    current_day_start_col = 0
+
+    for col_idx, (col_type, col_data) in enumerate(chart_columns):
+        if col_type == 'separator':
+            # End of previous day
+            if current_day_start_idx is not None:
+                mid_col = (current_day_start_col + col_idx) // 2
+                days.append((mid_col, sorted_times[current_day_start_idx], current_day_start_idx, data_idx + 1))
+            current_day_start_idx = None
+            current_day_start_col = col_idx + 1
+        else:
+            data_idx = col_data
+            if current_day_start_idx is None:
+                current_day_start_idx = data_idx
+                current_day_start_col = col_idx
+
+    # Add last day if exists
+    if current_day_start_idx is not None:
+        mid_col = (current_day_start_col + len(chart_columns)) // 2
+        days.append((mid_col, sorted_times[current_day_start_idx], current_day_start_idx, len(sorted_times)))
+
+    return {
+        'times': sorted_times,
+        'input': input_vals,
+        'output': output_vals,
+        'cache_creation': cache_creation_vals,
+        'cache_read': cache_read_vals,
+        'hours_per_interval': hours_per_interval,
+        'chart_columns': chart_columns,
+        'data_to_col': data_to_col,
+        'days': days,
+    }
+
+
+def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all', show_x_axis=True):
+    """Print a text-based stacked bar chart of token usage breakdown over time.
+
+    Args:
+        time_series: Time series data with token breakdown, as returned by
+            calculate_token_breakdown_time_series (parallel lists sorted by time)
+        height: Height of the chart
+        days_back: Number of days to show
+        chart_type: 'all' (all 4 types), 'io' (input+output), or 'cache' (cache_creation+cache_read)
+        show_x_axis: Whether to show X-axis labels
+    """
+    chart_data = prepare_stacked_bar_chart(time_series, days_back=days_back)
+    if chart_data is not None:
+        render_stacked_bar_chart(chart_data, height=height, chart_type=chart_type, show_x_axis=show_x_axis)
+
+
+def render_stacked_bar_chart(chart_data, height=75, chart_type='all', show_x_axis=True):
+    """Render a stacked bar chart from data prepared by prepare_stacked_bar_chart.
+
+    Args:
+        chart_data: Prepared chart data
+        height: Height of the chart
+        chart_type: 'all' (all 4 types), 'io' (input+output), or 'cache' (cache_creation+cache_read)
+        show_x_axis: Whether to show X-axis labels
+    """
+    sorted_times = chart_data['times']
+    chart_columns = chart_data['chart_columns']
+    data_to_col = chart_data['data_to_col']
 
-        # Resample to fit in 500 columns
-        step = max(1, len(sorted_times) // 500)
-        sorted_times = sorted_times[::step]
+    # Build the whole chart in memory and write it to stdout at once
+    buf = io.StringIO()
+
+    if chart_data['hours_per_interval'] > 1:
+        print(f"Note: Adjusting interval to {chart_data['hours_per_interval']} hours to fit in 500 columns.", file=buf)
 
     # Calculate breakdown per time interval
     breakdown_data = []
     totals = []
-    for time in sorted_times:
-        if time in time_series:
-            input_val = time_series[time].get('input', 0)
-            output_val = time_series[time].get('output', 0)
-            cache_creation_val = time_series[time].get('cache_creation', 0)
-            cache_read_val = time_series[time].get('cache_read', 0)
-        else:
-            input_val = output_val = cache_creation_val = cache_read_val = 0
-
+    for input_val, output_val, cache_creation_val, cache_read_val in zip(
+            chart_data['input'], chart_data['output'], chart_data['cache_creation'], chart_data['cache_read']):
         breakdown_data.append({
             'input': input_val,
             'output': output_val,
@@ -88,51 +270,30 @@ def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all
     min_value_raw = min(totals) if totals else 0
 
     # Round min/max to nearest multiple of 5K or 5M or 5B
-    def round_to_5_multiple(value, round_up=True):
-        """Round value to nearest multiple of 5B/5M/5K."""
-        if value >= 5_000_000_000:
-            # Round to nearest 5B
-            unit = 5_000_000_000
-        elif value >= 5_000_000:
-            # Round to nearest 5M
-            unit = 5_000_000
-        elif value >= 5_000:
-            # Round to nearest 5K
-            unit = 5_000
-        else:
-            # Round to nearest 5
-            unit = 5
-
-        if round_up:
-            return ((int(value) + unit - 1) // unit) * unit
-        else:
-            return (int(value) // unit) * unit
-
-    min_value = round_to_5_multiple(min_value_raw, round_up=False)
-    max_value = round_to_5_multiple(max_value_raw, round_up=True)
+    min_value = _round_to_5_multiple(min_value_raw, round_up=False)
+    max_value = _round_to_5_multiple(max_value_raw, round_up=True)
 
     # Ensure max > min
     if max_value == min_value:
         max_value = min_value + 5_000
 
-    num_data_points = len(totals)
     chart_height = height
 
     # Print chart title based on type
     if chart_type == 'io':
-        print("\nInput + Output Tokens Over Time (1-hour intervals, Local Time)")
-        print(f"Y-axis: Input and Output token consumption")
+        print("\nInput + Output Tokens Over Time (1-hour intervals, Local Time)", file=buf)
+        print(f"Y-axis: Input and Output token consumption", file=buf)
     elif chart_type == 'cache':
-        print("\nCache Tokens Over Time (1-hour intervals, Local Time)")
-        print(f"Y-axis: Cache Output and Cache Input token consumption")
+        print("\nCache Tokens Over Time (1-hour intervals, Local Time)", file=buf)
+        print(f"Y-axis: Cache Output and Cache Input token consumption", file=buf)
     else:
-        print("\nToken Usage Breakdown Over Time (1-hour intervals, Local Time)")
-        print(f"Y-axis: Token consumption (all token types)")
+        print("\nToken Usage Breakdown Over Time (1-hour intervals, Local Time)", file=buf)
+        print(f"Y-axis: Token consumption (all token types)", file=buf)
 
     if show_x_axis:
-        print(f"X-axis: Time (each day has 24 data points, ticks at 6-hour intervals)\n")
+        print(f"X-axis: Time (each day has 24 data points, ticks at 6-hour intervals)\n", file=buf)
     else:
-        print()
+        print(file=buf)
 
     # Scale breakdown values to chart height
     # For each data point, calculate the scaled heights of each segment
@@ -154,71 +315,25 @@ def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all
                 'cache_read': int((breakdown['cache_read'] - 0) / (max_value - min_value) * (chart_height - 1))
             })
 
-    # Build chart:
-    # First day: data points (no separator, Y-axis serves as the boundary)
-    # Subsequent days: separator + data points
-    chart_columns = []  # List of (type, value)
-    data_to_col = {}  # Map data point index to column index
-
-    col_idx = 0
-    for i in range(num_data_points):
-        time = sorted_times[i]
-
-        # Add separator before 00:00 (except for the very first day)
-        if time.hour == 0 and time.minute == 0 and i > 0:
-            chart_columns.append(('separator', None))
-            col_idx += 1
-
-        # Add data point
-        chart_columns.append(('data', i))
-        data_to_col[i] = col_idx
-        col_idx += 1
-
     chart_width = len(chart_columns)
-    print("=" * (chart_width + 10))
-
-    # Calculate daily totals for display at top of chart
-    daily_totals = []
-    current_day_start = None
-    current_day_total = 0
-    current_day_start_col = 0
-
-    for col_idx, (col_type, col_data) in enumerate(chart_columns):
-        if col_type == 'separator':
-            # End of previous day
-            if current_day_start is not None:
-                mid_col = (current_day_start_col + col_idx) // 2
-                daily_totals.append((mid_col, current_day_total, current_day_start))
-            current_day_start = None
-            current_day_total = 0
-            current_day_start_col = col_idx + 1
-        else:
-            data_idx = col_data
-            if current_day_start is None:
-                current_day_start = sorted_times[data_idx]
-                current_day_start_col = col_idx
-            current_day_total += totals[data_idx]
+    print("=" * (chart_width + 10), file=buf)
 
-    # Add last day if exists
-    if current_day_start is not None:
-        mid_col = (current_day_start_col + len(chart_columns)) // 2
-        daily_totals.append((mid_col, current_day_total, current_day_start))
+    # Daily totals for display at top of chart
+    daily_totals = [(mid_col, sum(totals[first_idx:end_idx]), day_start)
+                    for mid_col, day_start, first_idx, end_idx in chart_data['days']]
 
     # Print daily totals at top of chart (weekday + total tokens)
-    weekday_line = " " * 7  # Align with Y-axis
-    date_line = " " * 7  # Align with Y-axis
+    weekday_parts = [" " * 7]  # Align with Y-axis
+    date_parts = [" " * 7]  # Align with Y-axis
     prev_end = 0
 
-    weekday_abbr = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-    for day_idx, (mid_col, total, day_start) in enumerate(daily_totals):
-        total_str = format_total_value(total)
-        weekday = weekday_abbr[day_start.weekday()]
-        weekday_total = f"{weekday} : {total_str}"
-
-        # Format date as " MM / DD"
-        date_str = day_start.strftime(' %m / %d')
+    # Build all day labels in one pass: "Www : total" and the date as " MM / DD"
+    # (formatted from the date fields directly rather than through strftime)
+    day_labels = [(f"{WEEKDAY_ABBR[day_start.weekday()]} : {format_total_value(total)}",
+                   f" {day_start.month:02d} / {day_start.day:02d}")
+                  for _, total, day_start in daily_totals]
 
+    for (mid_col, _, _), (weekday_total, date_str) in zip(daily_totals, day_labels):
         # Find positions of : and /
         colon_idx = weekday_total.index(':')
         slash_idx = date_str.index('/')
@@ -244,92 +359,61 @@ def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all
         # Add padding and content to both lines
         padding = start_pos - prev_end
         if padding > 0:
-            weekday_line += " " * padding
-            date_line += " " * padding
+            weekday_parts.append(" " * padding)
+            date_parts.append(" " * padding)
 
-        weekday_line += weekday_total
-        date_line += date_str
+        weekday_parts.append(weekday_total)
+        date_parts.append(date_str)
         prev_end = start_pos + max_len
 
-    print(weekday_line)
-    print(date_line)
-
-    # Draw chart from top to bottom (stacked bar chart style)
-    for row in range(chart_height - 1, -1, -1):
-        # Y-axis label
-        y_val = min_value + (max_value - min_value) * row / (chart_height - 1)
-        y_label = f"{format_y_axis_value(y_val)} |"
-
-        # Chart line
-        line = ""
-        for col_type, col_data in chart_columns:
-            if col_type == 'separator':
-                line += "|"
-            else:
-                data_idx = col_data
-                breakdown = scaled_breakdown[data_idx]
-
-                # Calculate cumulative heights for stacking (bottom to top)
-                # Stack order: input (bottom) -> output -> cache_creation -> cache_read (top)
-                input_height = breakdown['input']
-                output_height = breakdown['output']
-                cache_creation_height = breakdown['cache_creation']
-                cache_read_height = breakdown['cache_read']
-
-                cumulative_input = input_height
-                cumulative_output = cumulative_input + output_height
-                cumulative_cache_creation = cumulative_output + cache_creation_height
-                cumulative_cache_read = cumulative_cache_creation + cache_read_height
-
-                # Determine which character to draw based on current row and chart_type
-                # ANSI 256-color codes: Cyan for input, Green for output, Orange for cache_output, Pink for cache_input
-                if chart_type == 'io':
-                    # Only show input and output
-                    if row < cumulative_input:
-                        line += "\033[38;5;51m\u2588\033[0m"  # Input tokens (Bright Cyan)
-                    elif row < cumulative_output:
-                        line += "\033[38;5;46m\u2593\033[0m"  # Output tokens (Bright Green)
-                    else:
-                        line += " "  # Empty space
-                elif chart_type == 'cache':
-                    # Only show cache_creation and cache_read, but calculate from 0
-                    cache_only_cumulative_creation = cache_creation_height
-                    cache_only_cumulative_read = cache_only_cumulative_creation + cache_read_height
-                    if row < cache_only_cumulative_creation:
-                        line += "\033[38;5;214m\u2592\033[0m"  # Cache output tokens (Bright Orange)
-                    elif row < cache_only_cumulative_read:
-                        line += "\u2588"  # Cache input tokens (default color)
-                    else:
-                        line += " "  # Empty space
-                else:
-                    # Show all 4 types
-                    if row < cumulative_input:
-                        line += "\033[38;5;51m\u2588\033[0m"  # Input tokens (Bright Cyan)
-                    elif row < cumulative_output:
-                        line += "\033[38;5;46m\u2593\033[0m"  # Output tokens (Bright Green)
-                    elif row < cumulative_cache_creation:
-                        line += "\033[38;5;214m\u2592\033[0m"  # Cache output tokens (Bright Orange)
-                    elif row < cumulative_cache_read:
-                        line += "\u2588\u2591"  # Cache input tokens (default color)
-                    else:
-                        line += " "  # Empty space
-
-        print(y_label + line)
+    print("".join(weekday_parts), file=buf)
+    print("".join(date_parts), file=buf)
 
-    # X-axis with day separators
-    # Position: 6 spaces to align + with Y-axis |
-    x_axis_line = ""
-    for col_type, _ in chart_columns:
+    # Stacked layers per chart type, bottom to top
+    # Stack order: input (bottom) -> output -> cache_creation -> cache_read (top)
+    if chart_type == 'io':
+        layer_cells = (CELL_INPUT, CELL_OUTPUT)
+        layer_keys = ('input', 'output')
+    elif chart_type == 'cache':
+        # Only show cache_creation and cache_read, but stack them from 0
+        layer_cells = (CELL_CACHE_OUTPUT, CELL_CACHE_INPUT)
+        layer_keys = ('cache_creation', 'cache_read')
+    else:
+        layer_cells = (CELL_INPUT, CELL_OUTPUT, CELL_CACHE_OUTPUT, CELL_CACHE_INPUT_ALL)
+        layer_keys = ('input', 'output', 'cache_creation', 'cache_read')
+
+    # Build each column bottom-up once, so rows become plain tuple indexing
+    separator_column = (CELL_SEPARATOR,) * chart_height
+    columns = []
+    for col_type, col_data in chart_columns:
         if col_type == 'separator':
-            x_axis_line += "\u2534"
+            columns.append(separator_column)
         else:
-            x_axis_line += "\u2500"
-    print("      \u2514" + x_axis_line)  # 6 spaces + corner aligns with Y-axis position
+            breakdown = scaled_breakdown[col_data]
+            heights = tuple(breakdown[key] for key in layer_keys)
+            columns.append(_stacked_column(layer_cells, heights, chart_height))
+
+    # Transpose the columns into rows (bottom row first)
+    rows = list(zip(*columns))
+
+    # Y-axis labels for every row
+    y_labels = [f"{format_y_axis_value(min_value + (max_value - min_value) * row / (chart_height - 1))} |"
+                for row in range(chart_height)]
+
+    # Draw chart from top to bottom (stacked bar chart style) with a single write
+    lines = [y_labels[row] + "".join(rows[row]) for row in range(chart_height - 1, -1, -1)]
+    buf.write("\n".join(lines) + "\n")
+
+    # X-axis with day separators
+    # Position: 6 spaces to align + with Y-axis |
+    x_axis_line = "".join(["\u2534" if col_type == 'separator' else "\u2500"
+                           for col_type, _ in chart_columns])
+    print("      \u2514" + x_axis_line, file=buf)  # 6 spaces + corner aligns with Y-axis position
 
     # X-axis labels (show only if show_x_axis is True)
     if show_x_axis:
         # X-axis labels (show only 6:00, 12:00, and 18:00) - rotated 90 degrees counter-clockwise
-        print()
+        print(file=buf)
 
         # Create label for 6:00, 12:00, and 18:00
         labels = []
@@ -349,74 +433,81 @@ def print_stacked_bar_chart(time_series, height=75, days_back=7, chart_type='all
         # Print each character position vertically
         # Position: 6 spaces to align first character with Y-axis | position
         # Then add one more space so labels start at column 0 of chart content
+        # Start each line from the separators, then place the label characters by column
+        blank_line = ["|" if col_type == 'separator' else " " for col_type, _ in chart_columns]
         for char_idx in range(max_label_len):
-            line = "       "  # 7 spaces: aligns with Y-axis format (5 chars + space + |)
-
-            for col_idx, (col_type, col_data) in enumerate(chart_columns):
-                if col_type == 'separator':
-                    char_to_print = "|"
-                else:
-                    # Check if this column has a label
-                    char_to_print = " "
-                    for label_idx, pos in enumerate(positions):
-                        if col_idx == pos and char_idx < len(labels[label_idx]):
-                            char_to_print = labels[label_idx][char_idx]
-                            break
+            line = blank_line.copy()
+            for label, pos in zip(labels, positions):
+                if char_idx < len(label):
+                    line[pos] = label[char_idx]
 
-                line += char_to_print
-
-            print(line)
+            print("       " + "".join(line), file=buf)  # 7 spaces: aligns with Y-axis format (5 chars + space + |)
 
     # Show summary info only for the last chart (when show_x_axis is True)
     if show_x_axis:
-        print("\n" + "=" * (chart_width + 10))
-        print(f"Total time span: {sorted_times[0].strftime('%Y-%m-%d %H:%M')} to {sorted_times[-1].strftime('%Y-%m-%d %H:%M')} | Data points: {len(sorted_times)}")
-        print(f"Legend: \033[38;5;51m\u2588\033[0m Input  \033[38;5;46m\u2593\033[0m Output  \u2588 Cache Input  \033[38;5;214m\u2592\033[0m Cache Output")
+        print("\n" + "=" * (chart_width + 10), file=buf)
+        print(f"Total time span: {sorted_times[0].strftime('%Y-%m-%d %H:%M')} to {sorted_times[-1].strftime('%Y-%m-%d %H:%M')} | Data points: {len(sorted_times)}", file=buf)
+        print(f"Legend: \033[38;5;51m\u2588\033[0m Input  \033[38;5;46m\u2593\033[0m Output  \u2588 Cache Input  \033[38;5;214m\u2592\033[0m Cache Output", file=buf)
+
+    sys.stdout.write(buf.getvalue())
 
 
 def print_model_chart(time_series, width=100, height=15):
-    """Print a text-based chart showing each model's usage over time."""
+    """Print a text-based chart showing each model's usage over time.
+
+    Args:
+        time_series: List of (time, {model: tokens}) tuples sorted by time,
+            as returned by calculate_time_series
+        width: Width of the chart
+        height: Height of the chart
+    """
     if not time_series:
         print("No time series data available.")
         return
 
-    sorted_times = sorted(time_series.keys())
+    sorted_times = [time for time, _ in time_series]
 
     if len(sorted_times) < 2:
         print("Not enough data points for chart.")
         return
 
-    # Get all models and their colors
-    all_models = set()
-    for models in time_series.values():
-        all_models.update(models.keys())
+    # Collect each model's tokens per time interval in a single pass
+    model_tokens = {}
+    for i, (_, models) in enumerate(time_series):
+        for model, tokens in models.items():
+            if model not in model_tokens:
+                model_tokens[model] = [0] * len(time_series)
+            model_tokens[model][i] = tokens
 
-    all_models = sorted(all_models)
+    # Get all models and their colors
+    all_models = sorted(model_tokens)
     model_symbols = {'claude-sonnet-4-5-20250929': '\u2588',
                      'claude-haiku-4-5-20251001': '\u2593',
                      'claude-opus-4-1-20250805': '\u2592'}
 
-    print("\n\nToken Usage by Model Over Time")
-    print("=" * width)
+    # Build the whole chart in memory and write it to stdout at once
+    buf = io.StringIO()
+
+    print("\n\nToken Usage by Model Over Time", file=buf)
+    print("=" * width, file=buf)
 
     for model in all_models:
         if model not in model_symbols:
             model_symbols[model] = '\u2591'
 
-        # Get values for this model
-        values = []
-        for time in sorted_times:
-            val = time_series[time].get(model, 0) / 1000  # KTok
-            values.append(val)
-
-        if all(v == 0 for v in values):
+        # Skip models without any usage before converting their values
+        tokens = model_tokens[model]
+        if not any(tokens):
             continue
 
+        # Get values for this model
+        values = [val / 1000 for val in tokens]  # KTok
+
         max_value = max(values)
 
         # Print model name
-        print(f"\n{model}:")
-        print(f"Max: {max_value:.1f} KTok")
+        print(f"\n{model}:", file=buf)
+        print(f"Max: {max_value:.1f} KTok", file=buf)
 
         # Simple bar chart
         chart_width = width - 25
@@ -425,4 +516,6 @@ def print_model_chart(time_series, width=100, height=15):
                 bar_length = int((val / max_value * chart_width)) if max_value > 0 else 0
                 time_str = sorted_times[i].strftime('%m/%d %H:%M')
                 bar = model_symbols[model] * bar_length
-                print(f"  {time_str} |{bar} {val:.1f}")
+                print(f"  {time_str} |{bar} {val:.1f}", file=buf)
+
+    sys.stdout.write(buf.getvalue())
@@ -68,8 +68,10 @@ def filter_usage_data_since_3am(usage_data):
 
         try:
             timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
-            if timestamp_local >= today_3am:
+            # Aware datetimes compare correctly in any timezone; only naive ones need converting
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.astimezone()
+            if timestamp >= today_3am:
                 filtered_data.append(entry)
         except Exception:
             continue
@@ -87,11 +89,11 @@ def calculate_daily_stats(usage_data):
     }
 
     for entry in usage_data:
-        usage = entry['message']['usage']
-        stats['input_tokens'] += usage.get('input_tokens', 0)
-        stats['output_tokens'] += usage.get('output_tokens', 0)
-        stats['cache_creation_tokens'] += usage.get('cache_creation_input_tokens', 0)
-        stats['cache_read_tokens'] += usage.get('cache_read_input_tokens', 0)
+        get = entry['message']['usage'].get
+        stats['input_tokens'] += get('input_tokens', 0)
+        stats['output_tokens'] += get('output_tokens', 0)
+        stats['cache_creation_tokens'] += get('cache_creation_input_tokens', 0)
+        stats['cache_read_tokens'] += get('cache_read_input_tokens', 0)
 
     return stats
 
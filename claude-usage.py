@@ -11,10 +11,30 @@ from datetime import datetime
 from data import get_claude_dir, read_jsonl_files, filter_usage_data_by_days
 from stats import calculate_model_breakdown, calculate_token_breakdown_time_series
 from formatting import print_model_breakdown
-from charts import print_stacked_bar_chart
+from charts import prepare_stacked_bar_chart, render_stacked_bar_chart
 from subscription import get_subscription_usage, print_subscription_usage_table
 
 
+# Cursor home, clear screen and scrollback (same as `clear`, without spawning a process)
+CLEAR_SCREEN = "\033[H\033[2J\033[3J"
+
+
+def enable_ansi_escapes():
+    """Enable ANSI escape sequence processing on Windows consoles."""
+    if os.name != 'nt':
+        return
+
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_ulong()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except Exception:
+        pass
+
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Analyze Claude Code usage statistics')
@@ -35,14 +55,15 @@ def main():
         """Print all statistics (for both one-time and monitor mode)."""
         # Clear screen in monitor mode
         if args.monitor:
-            os.system('clear' if os.name != 'nt' else 'cls')
+            sys.stdout.write(CLEAR_SCREEN)
 
         print("Calculating Claude Code usage...")
         print(f"Showing data from last {args.days} days")
         if args.monitor:
             print(f"Monitor mode: Refreshing every {args.monitor} seconds (Press Ctrl+C to exit)")
             print(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        # Show the header before the (potentially slow) read
+        print(flush=True)
 
         # Read data
         usage_data = read_jsonl_files(projects_dir)
@@ -59,8 +80,9 @@ def main():
             return False
 
         # Calculate and print statistics using filtered data
-        model_stats = calculate_model_breakdown(filtered_usage_data)
-        print_model_breakdown(model_stats, days_in_data=args.days)
+        # (the table and each chart are written to stdout in a single call)
+        model_stats, model_totals, model_costs = calculate_model_breakdown(filtered_usage_data)
+        print_model_breakdown(model_stats, model_totals, model_costs, days_in_data=args.days)
 
         # Calculate and print token breakdown time series (stacked bar charts)
         # Use 1-hour intervals for finer granularity
@@ -68,10 +90,11 @@ def main():
 
         # Print two separate charts: I/O tokens and Cache tokens
         # Each with reduced height (29) to make room for subscription usage table
-        print_stacked_bar_chart(breakdown_time_series, height=29, days_back=args.days,
-                                chart_type='io', show_x_axis=False)
-        print_stacked_bar_chart(breakdown_time_series, height=29, days_back=args.days,
-                                chart_type='cache', show_x_axis=True)
+        # Both charts share the same prepared data, so prepare it only once
+        chart_data = prepare_stacked_bar_chart(breakdown_time_series, days_back=args.days)
+        if chart_data is not None:
+            render_stacked_bar_chart(chart_data, height=29, chart_type='io', show_x_axis=False)
+            render_stacked_bar_chart(chart_data, height=29, chart_type='cache', show_x_axis=True)
 
         # Print subscription usage information
         print()
@@ -83,6 +106,8 @@ def main():
 
     # Monitor mode: interactive continuous refresh
     if args.monitor:
+        enable_ansi_escapes()
+
         print("\n" + "=" * 80)
         print("Interactive Monitor Mode")
         print("=" * 80)
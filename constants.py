@@ -30,9 +30,21 @@ DEFAULT_PRICING = {
     'cache_output': 1.875,
 }
 
+# Flat price tuples aligned with the token columns (input, output, cache_creation, cache_read),
+# so cost calculation needs a single lookup per model instead of one per price
+PRICE_KEYS = ('input', 'output', 'cache_output', 'cache_input')
+MODEL_PRICE_VECTORS = {
+    model: tuple(pricing[key] for key in PRICE_KEYS)
+    for model, pricing in MODEL_PRICING.items()
+}
+DEFAULT_PRICE_VECTOR = tuple(DEFAULT_PRICING[key] for key in PRICE_KEYS)
+
 # Subscription pricing
 SUBSCRIPTION_PRICE = 200  # $200 / month
 
 # Session and weekly duration constants (in minutes)
 SESSION_DURATION_MINUTES = 300  # 5 hours
 WEEKLY_DURATION_MINUTES = 10080  # 7 days = 168 hours
+
+# Minimum number of JSONL files before parsing is spread across worker processes
+PARALLEL_PARSE_MIN_FILES = 4
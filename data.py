@@ -1,10 +1,26 @@
 """Data reading and filtering functions for Claude Code usage analysis."""
 
-import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from constants import PARALLEL_PARSE_MIN_FILES
+
+# Use orjson when available (much faster C parser), fall back to the standard library
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# datetime.fromisoformat accepts a trailing 'Z' directly from Python 3.11 on
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+# Parsed usage entries per JSONL file: path -> (mtime, size, entries)
+_PARSE_CACHE = {}
+
 
 def get_claude_dir():
     """Get Claude configuration directory."""
@@ -12,26 +28,133 @@ def get_claude_dir():
     return Path(claude_dir)
 
 
-def read_jsonl_files(projects_dir):
-    """Read all JSONL files from projects directory."""
+def _parse_timestamp(timestamp_str):
+    """Parse an ISO timestamp into an aware datetime, or None if missing/invalid."""
+    if not timestamp_str:
+        return None
+    try:
+        # The 'Z' (UTC) suffix only ever ends the string; older Pythons need it spelled as an offset
+        if not _FROMISOFORMAT_ACCEPTS_Z and timestamp_str.endswith('Z'):
+            timestamp_str = timestamp_str[:-1] + '+00:00'
+        timestamp = datetime.fromisoformat(timestamp_str)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    # Naive timestamps are interpreted as local time
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.astimezone()
+    return timestamp
+
+
+def _usage_tokens(usage):
+    """Extract (input, output, cache_creation, cache_read) token counts from a usage dict."""
+    get = usage.get
+    return (get('input_tokens', 0),
+            get('output_tokens', 0),
+            get('cache_creation_input_tokens', 0),
+            get('cache_read_input_tokens', 0))
+
+
+def _parse_jsonl_file(jsonl_file):
+    """Parse a single JSONL file and return a usage record per entry with usage data.
+
+    Each record is a dict holding only what the statistics need: '_ts' (the
+    parsed timestamp, or None), '_model' and '_tokens' (input, output,
+    cache_creation, cache_read). Dropping the rest of the entry (message
+    content, ...) keeps the parse cache small and cheap to send back from
+    worker processes.
+    """
     usage_data = []
 
+    try:
+        # Read the whole file at once; both parsers accept bytes directly
+        data_bytes = jsonl_file.read_bytes()
+    except Exception:
+        return usage_data
+
+    for line in data_bytes.splitlines():
+        # Skip lines that cannot contain usage data without parsing them
+        # (tool calls, user and system messages, ...)
+        if b'"usage"' not in line:
+            continue
+        try:
+            data = json_loads(line)
+            message = data.get('message')
+            usage = message.get('usage') if message else None
+            # Only include entries with usage data
+            if usage:
+                # Parse the timestamp and extract the model and token counts once
+                # so the aggregation loops can use plain item lookups
+                usage_data.append({
+                    '_ts': _parse_timestamp(data.get('timestamp')),
+                    '_model': message.get('model', 'unknown'),
+                    '_tokens': _usage_tokens(usage),
+                })
+        except (ValueError, AttributeError):
+            continue
+
+    return usage_data
+
+
+def _usable_cpu_count():
+    """Return the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS and Windows
+        return os.cpu_count() or 1
+
+
+def _parse_jsonl_files(paths):
+    """Parse JSONL files, returning one list of usage records per path."""
+    # Parsing is CPU-bound and independent per file, so spread it across processes
+    # (a pool only pays off with at least two CPUs to run the workers on)
+    workers = _usable_cpu_count()
+    if len(paths) > PARALLEL_PARSE_MIN_FILES and workers >= 2:
+        chunksize = max(1, len(paths) // (4 * workers))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_parse_jsonl_file, paths, chunksize=chunksize))
+        except (OSError, BrokenProcessPool):
+            # Process pools are unavailable in some sandboxes; parse serially instead
+            pass
+
+    return [_parse_jsonl_file(jsonl_file) for jsonl_file in paths]
+
+
+def read_jsonl_files(projects_dir):
+    """Read all JSONL files from projects directory.
+
+    Returns one usage record per entry with usage data (see _parse_jsonl_file).
+    Parsed entries are cached per file and only re-read when the file's
+    modification time or size changes, so repeated calls (monitor mode)
+    only parse files that have been written to since the last call.
+    """
+    paths = []
+    changed = []
+
     for jsonl_file in projects_dir.rglob('*.jsonl'):
         try:
-            with open(jsonl_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        data = json.loads(line)
-                        # Only include entries with usage data
-                        if data.get('message') and data['message'].get('usage'):
-                            usage_data.append(data)
-                    except json.JSONDecodeError:
-                        continue
-        except Exception:
+            st = jsonl_file.stat()
+        except OSError:
             continue
+        paths.append(jsonl_file)
+
+        cached = _PARSE_CACHE.get(jsonl_file)
+        if cached is None or cached[0] != st.st_mtime or cached[1] != st.st_size:
+            changed.append((jsonl_file, st))
+
+    for (jsonl_file, st), file_data in zip(changed, _parse_jsonl_files([path for path, _ in changed])):
+        _PARSE_CACHE[jsonl_file] = (st.st_mtime, st.st_size, file_data)
+
+    # Forget files that have been removed since the last call
+    if len(_PARSE_CACHE) > len(paths):
+        current = set(paths)
+        for jsonl_file in [path for path in _PARSE_CACHE if path not in current]:
+            del _PARSE_CACHE[jsonl_file]
+
+    usage_data = []
+    for jsonl_file in paths:
+        usage_data.extend(_PARSE_CACHE[jsonl_file][2])
 
     return usage_data
 
@@ -41,41 +164,15 @@ def filter_usage_data_by_days(usage_data, days_back):
     if not usage_data:
         return []
 
-    # Get local timezone automatically
-    local_tz = datetime.now().astimezone().tzinfo
-
-    # Find the latest timestamp in the data
-    latest_time = None
-    for entry in usage_data:
-        timestamp_str = entry.get('timestamp')
-        if timestamp_str:
-            try:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                timestamp_local = timestamp.astimezone(local_tz)
-                if latest_time is None or timestamp_local > latest_time:
-                    latest_time = timestamp_local
-            except Exception:
-                continue
-
-    if latest_time is None:
-        return usage_data
-
-    # Calculate start time based on days_back
-    start_time = latest_time - timedelta(days=days_back)
+    # Entries without a valid timestamp ('_ts' is None) are excluded
+    timestamps = [entry['_ts'] for entry in usage_data if entry['_ts'] is not None]
 
-    # Filter data
-    filtered_data = []
-    for entry in usage_data:
-        timestamp_str = entry.get('timestamp')
-        if not timestamp_str:
-            continue
+    if not timestamps:
+        return usage_data
 
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
-            if timestamp_local >= start_time:
-                filtered_data.append(entry)
-        except Exception:
-            continue
+    # Calculate start time based on days_back, relative to the latest timestamp
+    # (aware datetimes compare correctly regardless of their timezone)
+    start_time = max(timestamps) - timedelta(days=days_back)
 
-    return filtered_data
+    return [entry for entry in usage_data
+            if entry['_ts'] is not None and entry['_ts'] >= start_time]
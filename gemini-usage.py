@@ -630,9 +630,6 @@ def filter_usage_data_by_days(usage_data, days_back):
     if not usage_data:
         return []
 
-    # Get local timezone automatically
-    local_tz = datetime.now().astimezone().tzinfo
-
     # Find the latest timestamp in the data
     latest_time = None
     for entry in usage_data:
@@ -640,9 +637,11 @@ def filter_usage_data_by_days(usage_data, days_back):
         if timestamp_str:
             try:
                 timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                timestamp_local = timestamp.astimezone(local_tz)
-                if latest_time is None or timestamp_local > latest_time:
-                    latest_time = timestamp_local
+                # Aware datetimes compare correctly in any timezone; only naive ones need converting
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.astimezone()
+                if latest_time is None or timestamp > latest_time:
+                    latest_time = timestamp
             except Exception:
                 continue
 
@@ -661,8 +660,9 @@ def filter_usage_data_by_days(usage_data, days_back):
 
         try:
             timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
-            if timestamp_local >= start_time:
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.astimezone()
+            if timestamp >= start_time:
                 filtered_data.append(entry)
         except Exception:
             continue
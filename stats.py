@@ -1,182 +1,285 @@
 """Statistics calculation functions for Claude Code usage analysis."""
 
+import functools
+import operator
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from constants import MODEL_PRICE_VECTORS, DEFAULT_PRICE_VECTOR
+
+# Most recent _model_groups result: (usage_data, len(usage_data), groups)
+_last_model_groups = None
+
+# Most recent _bucket_index result: (usage_data, len(usage_data), interval_hours, result)
+_last_bucket_index = None
+
+# Per-interval token sums for the most recent _bucket_index result: (index, result)
+_last_bucket_sums = None
+
+
+def _model_groups(usage_data):
+    """Group entries by model and sum their token columns.
+
+    Returns a dict mapping each model to (message_count, (input, output,
+    cache_creation, cache_read)). The result for the most recent call is cached,
+    so the overall and per-model statistics can share a single grouping pass.
+    """
+    global _last_model_groups
+
+    cached = _last_model_groups
+    if cached is not None and cached[0] is usage_data and cached[1] == len(usage_data):
+        return cached[2]
+
+    # Keep running per-model sums [count, input, output, cache_creation, cache_read] rather
+    # than per-model lists of every entry's tokens: just as fast, and memory stays
+    # proportional to the number of models
+    # ('_tokens' is (input, output, cache_creation, cache_read), extracted at load time)
+    model_sums = defaultdict(lambda: [0, 0, 0, 0, 0])
+    for entry in usage_data:
+        input_tokens, output_tokens, cache_creation, cache_read = entry['_tokens']
+        sums = model_sums[entry['_model']]
+        sums[0] += 1
+        sums[1] += input_tokens
+        sums[2] += output_tokens
+        sums[3] += cache_creation
+        sums[4] += cache_read
+
+    groups = {model: (sums[0], tuple(sums[1:])) for model, sums in model_sums.items()}
+
+    _last_model_groups = (usage_data, len(usage_data), groups)
+    return groups
+
 
 def calculate_overall_stats(usage_data):
     """Calculate overall usage statistics."""
+    # Add up the per-model sums column by column
+    columns = list(zip(*[sums for _, sums in _model_groups(usage_data).values()])) or [(), (), (), ()]
+
     stats = {
         'total_messages': len(usage_data),
-        'input_tokens': 0,
-        'output_tokens': 0,
-        'cache_creation_tokens': 0,
-        'cache_read_tokens': 0,
+        'input_tokens': sum(columns[0]),
+        'output_tokens': sum(columns[1]),
+        'cache_creation_tokens': sum(columns[2]),
+        'cache_read_tokens': sum(columns[3]),
     }
 
-    for entry in usage_data:
-        usage = entry['message']['usage']
-        stats['input_tokens'] += usage.get('input_tokens', 0)
-        stats['output_tokens'] += usage.get('output_tokens', 0)
-        stats['cache_creation_tokens'] += usage.get('cache_creation_input_tokens', 0)
-        stats['cache_read_tokens'] += usage.get('cache_read_input_tokens', 0)
-
     stats['total_tokens'] = stats['input_tokens'] + stats['output_tokens']
 
     return stats
 
 
-def calculate_model_breakdown(usage_data):
-    """Calculate usage breakdown by model."""
-    model_stats = defaultdict(lambda: {
-        'count': 0,
-        'input': 0,
-        'output': 0,
-        'cache_creation': 0,
-        'cache_read': 0,
-    })
-
-    for entry in usage_data:
-        model = entry['message'].get('model', 'unknown')
-        usage = entry['message']['usage']
-
-        model_stats[model]['count'] += 1
-        model_stats[model]['input'] += usage.get('input_tokens', 0)
-        model_stats[model]['output'] += usage.get('output_tokens', 0)
-        model_stats[model]['cache_creation'] += usage.get('cache_creation_input_tokens', 0)
-        model_stats[model]['cache_read'] += usage.get('cache_read_input_tokens', 0)
+def calculate_model_breakdown(usage_data, compute_costs=True):
+    """Calculate usage breakdown by model.
 
-    # Calculate totals and sort by total tokens
+    Returns (model_stats, totals, costs): the per-model statistics sorted by
+    total tokens, their sums over all listed models (same keys as a model row),
+    and the API cost per token type with its subtotals (None if compute_costs
+    is False).
+    """
+    # Calculate per-model and overall totals in the same pass
     result = []
+    sum_messages = sum_input = sum_output = sum_cache_creation = sum_cache_read = 0
 
-    # First pass: calculate total message count and populate result
-    total_messages = sum(stats['count'] for stats in model_stats.values())
+    total_messages = len(usage_data)
     threshold = total_messages * 0.001  # 0.1% threshold
 
-    for model, stats in model_stats.items():
+    for model, (count, (input_tokens, output_tokens, cache_creation, cache_read)) in _model_groups(usage_data).items():
         # Skip models with less than 0.1% of total messages
-        if stats['count'] < threshold:
+        if count < threshold:
             continue
-        stats['model'] = model
-        stats['total'] = stats['input'] + stats['output']
-        stats['total_with_cache'] = stats['input'] + stats['output'] + stats['cache_creation'] + stats['cache_read']
-        result.append(stats)
 
+        result.append({
+            'count': count,
+            'input': input_tokens,
+            'output': output_tokens,
+            'cache_creation': cache_creation,
+            'cache_read': cache_read,
+            'model': model,
+            'total': input_tokens + output_tokens,
+            'total_with_cache': input_tokens + output_tokens + cache_creation + cache_read,
+        })
+
+        sum_messages += count
+        sum_input += input_tokens
+        sum_output += output_tokens
+        sum_cache_creation += cache_creation
+        sum_cache_read += cache_read
+
+    # Sort by total tokens
     result.sort(key=lambda x: x['total'], reverse=True)
-    return result
 
+    totals = {
+        'count': sum_messages,
+        'input': sum_input,
+        'output': sum_output,
+        'cache_creation': sum_cache_creation,
+        'cache_read': sum_cache_read,
+        'total': sum_input + sum_output,
+        'total_with_cache': sum_input + sum_output + sum_cache_creation + sum_cache_read,
+    }
 
-def calculate_time_series(usage_data, interval_hours=1):
-    """Calculate token usage over time in specified hour intervals (local timezone)."""
-    # Get local timezone automatically
-    local_tz = datetime.now().astimezone().tzinfo
+    costs = _calculate_costs(result) if compute_costs else None
 
-    # Group by time interval and model
-    time_series = defaultdict(lambda: defaultdict(int))
+    return result, totals, costs
 
-    for entry in usage_data:
-        timestamp_str = entry.get('timestamp')
-        if not timestamp_str:
-            continue
 
-        try:
-            # Parse ISO timestamp and convert to local timezone
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
+@functools.lru_cache(maxsize=64)
+def _pricing_vector(models):
+    """Return the price columns (input, output, cache output, cache input) for a tuple of models."""
+    return tuple(zip(*[MODEL_PRICE_VECTORS.get(model, DEFAULT_PRICE_VECTOR) for model in models]))
 
-            # Round down to the nearest interval
-            hour = timestamp_local.hour
-            interval_hour = (hour // interval_hours) * interval_hours
-            interval_time = timestamp_local.replace(hour=interval_hour, minute=0, second=0, microsecond=0)
 
-            model = entry['message'].get('model', 'unknown')
-            usage = entry['message']['usage']
+def _calculate_costs(model_stats):
+    """Calculate API costs per token type using model-specific pricing."""
+    # Each cost is the dot product of a token column with the matching price column;
+    # the price columns only depend on the listed models, so repeated reports reuse them
+    token_matrix = [(stats['input'], stats['output'], stats['cache_creation'], stats['cache_read'])
+                    for stats in model_stats]
+    price_columns = _pricing_vector(tuple(stats['model'] for stats in model_stats))
+    column_costs = [sum(map(operator.mul, token_column, price_column)) / 1_000_000
+                    for token_column, price_column in zip(zip(*token_matrix), price_columns)]
+    input_cost, output_cost, cache_creation_cost, cache_read_cost = column_costs or (0, 0, 0, 0)
 
-            # Total tokens (input + output, in kilo tokens)
-            total_tokens = usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+    return {
+        'input': input_cost,
+        'output': output_cost,
+        'io_total': input_cost + output_cost,
+        'cache_creation': cache_creation_cost,
+        'cache_read': cache_read_cost,
+        'cache_total': cache_creation_cost + cache_read_cost,
+        'total': input_cost + output_cost + cache_creation_cost + cache_read_cost,
+    }
 
-            time_series[interval_time][model] += total_tokens
-        except Exception:
-            continue
 
-    return time_series
+def _valid_entries(usage_data):
+    """Return the entries whose timestamp could be parsed at load time."""
+    # '_ts' is the timestamp parsed at load time (None if missing or invalid)
+    return [entry for entry in usage_data if entry['_ts'] is not None]
 
 
-def calculate_all_tokens_time_series(usage_data, interval_hours=1):
-    """Calculate ALL token usage (input + output + cache) over time in specified hour intervals (local timezone)."""
-    # Get local timezone automatically
+def _bucket_index(usage_data, interval_hours):
+    """Assign every entry with a valid timestamp to its interval (local timezone).
+
+    Returns (interval_times, bucket_ids, tokens, models): interval_times is the
+    sorted list of distinct interval start times, and the other three are
+    parallel per-entry lists of the entry's index into interval_times, its
+    '_tokens' tuple and its model. The result for the most recent call is
+    cached, so the time series functions can share a single pass over the data.
+    """
+    global _last_bucket_index
+
+    cached = _last_bucket_index
+    if (cached is not None and cached[0] is usage_data
+            and cached[1] == len(usage_data) and cached[2] == interval_hours):
+        return cached[3]
+
+    # Get local timezone automatically (a fixed UTC offset); resolved per call so that
+    # long-running monitor mode follows DST changes
     local_tz = datetime.now().astimezone().tzinfo
+    local_offset = int(local_tz.utcoffset(None).total_seconds())
 
-    # Group by time interval (all models combined)
-    time_series = defaultdict(lambda: defaultdict(int))
+    interval_seconds = interval_hours * 3600
 
-    for entry in usage_data:
-        timestamp_str = entry.get('timestamp')
-        if not timestamp_str:
-            continue
+    # Drop entries without a timestamp once, so the passes below need no per-entry checks
+    entries = _valid_entries(usage_data)
 
-        try:
-            # Parse ISO timestamp and convert to local timezone
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
+    # Work in integer seconds since the epoch, shifted to local time, and round down
+    # to the nearest interval (intervals restart at local midnight)
+    local_seconds = [int(entry['_ts'].timestamp()) + local_offset for entry in entries]
+    buckets = [seconds - seconds % 86400 % interval_seconds for seconds in local_seconds]
+    tokens = [entry['_tokens'] for entry in entries]
+    models = [entry['_model'] for entry in entries]
 
-            # Round down to the nearest interval
-            hour = timestamp_local.hour
-            interval_hour = (hour // interval_hours) * interval_hours
-            interval_time = timestamp_local.replace(hour=interval_hour, minute=0, second=0, microsecond=0)
+    # Number the distinct intervals in time order and create one datetime per interval
+    sorted_buckets = sorted(set(buckets))
+    bucket_to_id = {bucket: bucket_id for bucket_id, bucket in enumerate(sorted_buckets)}
+    interval_times = [datetime.fromtimestamp(bucket - local_offset, local_tz) for bucket in sorted_buckets]
+    bucket_ids = [bucket_to_id[bucket] for bucket in buckets]
 
-            usage = entry['message']['usage']
+    result = (interval_times, bucket_ids, tokens, models)
+    _last_bucket_index = (usage_data, len(usage_data), interval_hours, result)
+    return result
 
-            # ALL tokens: input + output + cache_creation + cache_read
-            total_tokens = (usage.get('input_tokens', 0) +
-                          usage.get('output_tokens', 0) +
-                          usage.get('cache_creation_input_tokens', 0) +
-                          usage.get('cache_read_input_tokens', 0))
 
-            # Use 'all' as a single model key to combine all models
-            time_series[interval_time]['all'] += total_tokens
-        except Exception:
-            continue
+def _bucket_sums(usage_data, interval_hours):
+    """Sum the token columns per interval.
+
+    Returns (interval_times, columns), where columns holds one list per token
+    type (input, output, cache_creation, cache_read) with the sum for each
+    interval. The sums for the most recent bucket index are cached, so the
+    time series functions share the same preallocated output lists.
+    """
+    global _last_bucket_sums
+
+    index = _bucket_index(usage_data, interval_hours)
+    cached = _last_bucket_sums
+    if cached is not None and cached[0] is index:
+        return cached[1]
+
+    interval_times, bucket_ids, tokens, _ = index
+
+    # Accumulate into preallocated per-column lists (plain list indexing, no hashing)
+    num_buckets = len(interval_times)
+    input_sums = [0] * num_buckets
+    output_sums = [0] * num_buckets
+    cache_creation_sums = [0] * num_buckets
+    cache_read_sums = [0] * num_buckets
+    for bucket_id, (input_tokens, output_tokens, cache_creation, cache_read) in zip(bucket_ids, tokens):
+        input_sums[bucket_id] += input_tokens
+        output_sums[bucket_id] += output_tokens
+        cache_creation_sums[bucket_id] += cache_creation
+        cache_read_sums[bucket_id] += cache_read
+
+    result = (interval_times, (input_sums, output_sums, cache_creation_sums, cache_read_sums))
+    _last_bucket_sums = (index, result)
+    return result
 
-    return time_series
 
+def calculate_time_series(usage_data, interval_hours=1):
+    """Calculate token usage over time in specified hour intervals (local timezone).
 
-def calculate_token_breakdown_time_series(usage_data, interval_hours=1):
-    """Calculate token usage breakdown (input/output/cache_creation/cache_read) over time in specified hour intervals (local timezone)."""
-    # Get local timezone automatically
-    local_tz = datetime.now().astimezone().tzinfo
+    Returns a list of (interval_time, {model: tokens}) tuples sorted by time.
+    """
+    interval_times, bucket_ids, tokens, models = _bucket_index(usage_data, interval_hours)
 
-    # Group by time interval with breakdown
-    time_series = defaultdict(lambda: {
-        'input': 0,
-        'output': 0,
-        'cache_creation': 0,
-        'cache_read': 0
-    })
+    # Group by time interval and model
+    time_series = [defaultdict(int) for _ in interval_times]
 
-    for entry in usage_data:
-        timestamp_str = entry.get('timestamp')
-        if not timestamp_str:
-            continue
+    for bucket_id, (input_tokens, output_tokens, _, _), model in zip(bucket_ids, tokens, models):
+        # Total tokens (input + output)
+        time_series[bucket_id][model] += input_tokens + output_tokens
 
-        try:
-            # Parse ISO timestamp and convert to local timezone
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-            timestamp_local = timestamp.astimezone(local_tz)
+    # Intervals are already in time order
+    return [(interval_time, dict(model_tokens)) for interval_time, model_tokens in zip(interval_times, time_series)]
 
-            # Round down to the nearest interval
-            hour = timestamp_local.hour
-            interval_hour = (hour // interval_hours) * interval_hours
-            interval_time = timestamp_local.replace(hour=interval_hour, minute=0, second=0, microsecond=0)
 
-            usage = entry['message']['usage']
+def calculate_all_tokens_time_series(usage_data, interval_hours=1):
+    """Calculate ALL token usage (input + output + cache) over time in specified hour intervals (local timezone).
 
-            # Accumulate each token type separately
-            time_series[interval_time]['input'] += usage.get('input_tokens', 0)
-            time_series[interval_time]['output'] += usage.get('output_tokens', 0)
-            time_series[interval_time]['cache_creation'] += usage.get('cache_creation_input_tokens', 0)
-            time_series[interval_time]['cache_read'] += usage.get('cache_read_input_tokens', 0)
-        except Exception:
-            continue
+    Returns a list of (interval_time, {'all': tokens}) tuples sorted by time.
+    """
+    interval_times, columns = _bucket_sums(usage_data, interval_hours)
+
+    # ALL tokens: input + output + cache_creation + cache_read
+    # Use 'all' as a single model key to combine all models
+    return [(interval_time, {'all': sum(breakdown)})
+            for interval_time, breakdown in zip(interval_times, zip(*columns))]
 
-    return time_series
+
+def calculate_token_breakdown_time_series(usage_data, interval_hours=1):
+    """Calculate token usage breakdown (input/output/cache_creation/cache_read) over time in specified hour intervals (local timezone).
+
+    Returns a dict of parallel lists sorted by time: 'times' holds the interval
+    start times and 'input', 'output', 'cache_creation' and 'cache_read' hold
+    the token counts for each interval.
+    """
+    interval_times, (input_sums, output_sums, cache_creation_sums, cache_read_sums) = _bucket_sums(usage_data, interval_hours)
+
+    # Each token type is summed separately per interval
+    return {
+        'times': interval_times,
+        'input': input_sums,
+        'output': output_sums,
+        'cache_creation': cache_creation_sums,
+        'cache_read': cache_read_sums,
+    }